@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import degrees
+from util import SearchStats
+
+# Search engines the benchmark can compare, slowest first
+ENGINES = ("bfs", "bidirectional", "compact", "landmarks")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees.py search engines."
+    )
+    parser.add_argument(
+        "--directory",
+        help="benchmark existing CSV data instead of a synthetic graph"
+    )
+    parser.add_argument("--people", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=8000)
+    parser.add_argument("--cast", type=int, default=5,
+                        help="stars per synthetic movie")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--landmarks", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=list(ENGINES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory
+        if directory is None:
+            directory = scratch
+            generate(directory, args.people, args.movies, args.cast,
+                     args.seed)
+
+        degrees.load_data(directory)
+        queries = pick_queries(list(degrees.people), args.queries, args.seed)
+
+        reference = None
+        for engine in args.engines:
+            loaded, stats, lengths = run(engine, directory, queries,
+                                         args.landmarks)
+            report(engine, loaded, stats)
+            if reference is None:
+                reference = (engine, lengths)
+            elif lengths != reference[1]:
+                sys.exit(f"{engine} disagrees with {reference[0]} "
+                         "on path lengths")
+
+
+def generate(directory, people, movies, cast, seed=0):
+    """
+    Writes a synthetic people.csv, movies.csv and stars.csv to
+    `directory`, with `cast` stars per movie. Low-numbered people are
+    cast far more often than the rest, like the hubs of the IMDB graph.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("id,name,birth\n")
+        for i in range(people):
+            f.write(f'{i + 1},"Person {i + 1}",{1900 + rng.randrange(110)}\n')
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("id,title,year\n")
+        for i in range(movies):
+            f.write(f'{i + 1},"Movie {i + 1}",{1920 + rng.randrange(100)}\n')
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("person_id,movie_id\n")
+        for movie in range(movies):
+            for _ in range(cast):
+                person = int(people * rng.random() ** 3)
+                f.write(f"{person + 1},{movie + 1}\n")
+
+
+def pick_queries(person_ids, count, seed=0):
+    """
+    Returns a fixed list of `count` pairs of different people.
+    """
+    rng = random.Random(seed)
+    person_ids.sort()
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(count)]
+
+
+def run(engine, directory, queries, landmark_count):
+    """
+    Answers `queries` with one search engine.
+
+    Returns the seconds spent loading data, the SearchStats of the
+    queries, and the length of each path found (None if not connected).
+    """
+    start = time.perf_counter()
+    if engine in ("bfs", "bidirectional"):
+        degrees.load_data(directory)
+        degrees.landmarks = None
+    else:
+        degrees.load_data(directory, compact=True, cache=False)
+        degrees.landmarks = None
+        if engine == "landmarks":
+            degrees.load_landmarks(directory, landmark_count)
+    loaded = time.perf_counter() - start
+
+    stats = SearchStats()
+    degrees.stats = stats
+    lengths = []
+    try:
+        for source, target in queries:
+            path = degrees.shortest_path(
+                source, target, bidirectional=(engine != "bfs")
+            )
+            lengths.append(None if path is None else len(path))
+    finally:
+        degrees.stats = None
+    return loaded, stats, lengths
+
+
+def report(engine, loaded, stats):
+    """
+    Prints one engine's results.
+    """
+    summary = stats.summary()
+    rate = summary["queries"] / summary["seconds"] if summary["seconds"] else 0
+    print(f"{engine}:")
+    print(f"    load {loaded:.3f}s, {summary['queries']} queries "
+          f"in {summary['seconds']:.3f}s ({rate:.0f}/s)")
+    print(f"    latency p50 {summary['p50'] * 1000:.3f}ms, "
+          f"p95 {summary['p95'] * 1000:.3f}ms")
+    print(f"    expanded {summary['expanded']}, reached {summary['reached']}, "
+          f"scanned {summary['scanned']}, "
+          f"frontier peak {summary['frontier_peak']}, "
+          f"neighbor sets {summary['allocations']}")
+
+
+if __name__ == "__main__":
+    main()
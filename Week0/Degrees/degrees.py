@@ -1,6 +1,13 @@
+import argparse
 import csv
+import itertools
+import multiprocessing
 import sys
 
+from graph import (
+    Graph, LandmarkIndex, PeopleView, MoviesView, NamesView, join_paths
+)
+from lookup import NameIndex, POLICIES
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +19,48 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, set when loading with `compact=True`
+graph = None
 
-def load_data(directory):
+# Landmark distance oracle over the compact graph, set by load_landmarks
+landmarks = None
+
+# Prefix and trigram index over `names`, built on first use by name_index
+finder = None
+
+# util.SearchStats that shortest_path reports to, if set
+stats = None
+
+
+def load_data(directory, compact=False, cache=True):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, the data is kept in a compact Graph and
+    `names`, `people` and `movies` become read-only views over it.
+    With `cache`, the graph is memory-mapped from a snapshot next to
+    the CSV files, which is (re)written whenever the files change.
     """
+    global graph, names, people, movies, finder
+
+    finder = None
+
+    if compact:
+        if cache:
+            graph = Graph.from_directory(directory)
+        else:
+            graph = Graph.from_csv(directory)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        report_skipped(graph.skipped_stars)
+        return
+
+    # Replace any views left by an earlier compact load
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -42,6 +86,7 @@ def load_data(directory):
             }
 
     # Load stars
+    skipped = 0
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -49,27 +94,87 @@ def load_data(directory):
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
-                pass
+                skipped += 1
+    report_skipped(skipped)
+
+
+def report_skipped(count):
+    """
+    Warns about rows of stars.csv that could not be loaded.
+    """
+    if count:
+        print(f"Skipped {count} rows of stars.csv naming unknown "
+              "people or movies.", file=sys.stderr)
+
+
+# Number of batch queries read and answered together
+BATCH_SIZE = 1000
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="answer tab-separated name pairs from FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="answer batch queries in N worker processes"
+    )
+    parser.add_argument(
+        "--landmarks", type=int, default=0, metavar="K",
+        help="rule out disconnected pairs with K landmark actors"
+    )
+    parser.add_argument(
+        "--pick", choices=POLICIES, default="strict",
+        help="how batch mode settles names shared by several people"
+    )
+    parser.add_argument(
+        "--fuzzy", action="store_true",
+        help="let batch mode fall back to the closest spelled name"
+    )
+    args = parser.parse_args()
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    load_data(args.directory, compact=True)
+    if args.landmarks:
+        load_landmarks(args.directory, args.landmarks)
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        if args.batch == "-":
+            lines = sys.stdin
+        else:
+            lines = open(args.batch, encoding="utf-8")
+        with lines:
+            if args.workers > 1:
+                with worker_pool(args.directory, args.workers,
+                                 args.landmarks) as pool:
+                    run_batch(lines, sys.stdout,
+                              lambda pairs: parallel_paths(
+                                  pool, args.workers, pairs
+                              ), args.pick, args.fuzzy)
+            else:
+                run_batch(lines, sys.stdout, None, args.pick, args.fuzzy)
+        return
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
+        suggest(name)
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
+        suggest(name)
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -84,17 +189,269 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def load_landmarks(directory, count):
+    """
+    Loads (or builds and caches) a landmark index of `count` actors
+    for the compact graph loaded from `directory`.
+    """
+    global landmarks
+    landmarks = LandmarkIndex.from_directory(graph, directory, count)
+
+
+def degrees_between(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark index, without searching. The bounds
+    are equal whenever the exact answer is known; a lower bound of
+    infinity means the two are not connected.
+
+    Requires landmarks loaded with `load_landmarks`.
+    """
+    if landmarks is None:
+        raise Exception("degrees_between needs landmarks")
+    return landmarks.bounds(
+        graph_index(source), graph_index(target)
+    )
+
+
+def run_batch(lines, out, solve=None, policy="strict", fuzzy=False):
+    """
+    Answers one query per line of `lines`, each holding a source and a
+    target name separated by a tab, writing one tab-separated result
+    line per query to `out` as each block of queries is answered.
+    Each block's (source, target) id pairs are passed to `solve`,
+    which defaults to `shortest_paths`. Names are resolved with
+    `batch_person_id` under the given `policy` and `fuzzy` setting.
+
+    Results hold both names, then the degrees of separation followed by
+    the path, or one of "not found", "ambiguous" or "not connected".
+    """
+    lines = (line.rstrip("\r\n") for line in lines if line.strip())
+    while True:
+        block = list(itertools.islice(lines, BATCH_SIZE))
+        if not block:
+            return
+
+        queries = []
+        for line in block:
+            source, _, target = line.partition("\t")
+            source = source.strip()
+            target = target.strip()
+            queries.append((source, target,
+                            batch_person_id(source, policy, fuzzy),
+                            batch_person_id(target, policy, fuzzy)))
+
+        pairs = [(source_id, target_id)
+                 for _, _, source_id, target_id in queries
+                 if source_id in people and target_id in people]
+        paths = iter((solve or shortest_paths)(pairs))
+
+        for source, target, source_id, target_id in queries:
+            if source_id in people and target_id in people:
+                result = describe_path(next(paths))
+            else:
+                result = source_id if source_id not in people else target_id
+            print(f"{source}\t{target}\t{result}", file=out)
+        out.flush()
+
+
+def batch_person_id(name, policy="strict", fuzzy=False):
+    """
+    Returns the IMDB id for a person's name without asking, or
+    "not found" or "ambiguous" if that cannot be settled.
+
+    With `fuzzy`, an unknown name is read as the most similarly spelled
+    known name. A name shared by several people is ambiguous under the
+    "strict" policy, and under "popular" means the one in most movies.
+    """
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) == 0 and fuzzy:
+        similar = name_index().similar(name, 1)
+        if similar:
+            person_ids = names[similar[0]]
+
+    if len(person_ids) == 0:
+        return "not found"
+    elif len(person_ids) > 1:
+        if policy == "popular":
+            return ranked_people(person_ids)[0]
+        return "ambiguous"
+    return next(iter(person_ids))
+
+
+def name_index():
+    """
+    Returns the NameIndex over `names`, building it on first use.
+    """
+    global finder
+    if finder is None:
+        finder = NameIndex(names)
+    return finder
+
+
+def ranked_people(person_ids):
+    """
+    Returns person ids ordered from most to fewest movies starred in.
+    """
+    return sorted(person_ids,
+                  key=lambda person_id: (-len(people[person_id]["movies"]),
+                                         person_id))
+
+
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` person ids that `name` may refer to, best first:
+    people with exactly that name, then names it is a prefix of, then
+    similarly spelled names, each most prolific first.
+    """
+    candidates = []
+    for key in name_index().candidates(name, limit):
+        candidates.extend(ranked_people(names[key]))
+    return candidates[:limit]
+
+
+def suggest(name):
+    """
+    Prints the people a misspelt or partial name may have meant.
+    """
+    candidates = candidates_for_name(name, 5)
+    if candidates:
+        print("Did you mean:")
+        for person_id in candidates:
+            person = people[person_id]
+            print(f"    {person['name']} ({person['birth']})")
+
+
+def describe_path(path):
+    """
+    Returns the degrees of separation and the steps of a path, as
+    tab-separated text, or "not connected" if there is no path.
+    """
+    if path is None:
+        return "not connected"
+    steps = [f"{movies[movie_id]['title']} > {people[person_id]['name']}"
+             for movie_id, person_id in path]
+    return f"{len(path)}\t" + " > ".join(steps)
+
+
+def shortest_paths(pairs):
+    """
+    Returns the shortest path, as from `shortest_path`, for each
+    (source, target) pair in the list `pairs`.
+
+    Every pair gets its own bidirectional search. On the compact graph,
+    a search that exhausts one side has found that side's whole
+    connected component, so later pairs it separates are answered
+    as not connected without searching.
+    """
+    components = {} if graph is not None else None
+    return [shortest_path(source, target, bidirectional=True,
+                          components=components)
+            for source, target in pairs]
+
+
+def worker_pool(directory, workers, landmark_count=0):
+    """
+    Returns a pool of `workers` processes sharing the read-only graph
+    (and landmark index of `landmark_count` actors, if any).
+
+    Where processes can be forked, workers inherit the loaded graph;
+    otherwise each one memory-maps the snapshot of `directory`, so the
+    operating system still shares its pages between them.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return context.Pool(workers, initializer=init_worker,
+                        initargs=(directory, landmark_count))
+
+
+def init_worker(directory, landmark_count):
+    """
+    Loads the graph in a worker process, unless it was inherited.
+    """
+    if graph is None:
+        load_data(directory, compact=True)
+        if landmark_count:
+            load_landmarks(directory, landmark_count)
+
+
+def parallel_paths(pool, workers, pairs):
+    """
+    Returns the same paths as `shortest_paths(pairs)`, answering
+    equal runs of the pairs in the `workers` processes of `pool`.
+    """
+    size = max(1, len(pairs) // (4 * workers))
+    chunks = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+    paths = []
+    for chunk_paths in pool.imap(shortest_paths, chunks):
+        paths.extend(chunk_paths)
+    return paths
+
+
+def distances_from(source):
+    """
+    Returns a graph.DistanceMap of the degrees of separation from the
+    source to every person, computed by a single breadth-first search.
+    Paths can then be read off it with `path_from`.
+
+    Requires data loaded with `compact=True`.
+    """
+    if graph is None:
+        raise Exception("distances_from needs a compact graph")
+    return graph.distances_from(graph_index(source))
+
+
+def path_from(distances, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source of a DistanceMap to the target.
+
+    If no possible path, returns None.
+    """
+    path = distances.path_to(graph_index(target))
+    if path is None:
+        return None
+    return ids_for_path(path)
+
+
+def shortest_path(source, target, bidirectional=False, components=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, searches from both ends at once.
+    Data loaded with `compact=True` is always searched from both ends,
+    whatever `bidirectional` says, since that finds an equally short
+    path for a fraction of the work. `components` is passed on to
+    `Graph.shortest_path` there.
     If no possible path, returns None.
     """
 
     source = str(source)
     target = str(target)
 
+    if stats is not None:
+        stats.start()
+    try:
+        if graph is not None:
+            return compact_path(source, target, components)
+        if bidirectional:
+            return bidirectional_path(source, target)
+        return breadth_first_path(source, target)
+    finally:
+        if stats is not None:
+            stats.stop()
+
+
+def breadth_first_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from the source.
+
+    If no possible path, returns None.
+    """
     bfs = QueueFrontier()
     visited = set()
     visited.add(source)
@@ -103,7 +460,9 @@ def shortest_path(source, target):
         node = Node(neighbor[1], None, neighbor[0])
         visited.add(node.state)
         bfs.add(node)
-
+    if stats is not None:
+        stats.scanned += len(neighbors)
+        stats.level(1, len(bfs.frontier))
 
     while not bfs.empty():
         current = bfs.remove()
@@ -119,14 +478,122 @@ def shortest_path(source, target):
 
         neighbors = neighbors_for_person(current.state)
 
+        reached = len(bfs.frontier)
         for neighbor in neighbors:
             if neighbor[1] not in visited:
                 node = Node(neighbor[1], current, neighbor[0])
                 bfs.add(node)
                 visited.add(node.state)
+        if stats is not None:
+            stats.scanned += len(neighbors)
+            stats.level(1, len(bfs.frontier) - reached)
+            stats.frontier(len(bfs.frontier))
 
     return None
-        
+
+
+def compact_path(source, target, components=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching the compact graph.
+
+    If no possible path, returns None.
+    """
+    path = graph.shortest_path(
+        graph_index(source), graph_index(target), landmarks, stats,
+        components
+    )
+    if path is None:
+        return None
+    return ids_for_path(path)
+
+
+def graph_index(person_id):
+    """
+    Returns the index in the compact graph of the person with IMDB id
+    `person_id`, raising KeyError if there is no such person.
+    """
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    return person
+
+
+def ids_for_path(path):
+    """
+    Converts a path of (movie, person) graph indices
+    into (movie_id, person_id) pairs.
+    """
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one BFS tree
+    from each end and always expanding the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # leading back towards the root of that side's search
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward
+            )
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward
+            )
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, parents, other):
+    """
+    Expands a whole BFS level of one side of a bidirectional search,
+    stopping as soon as it meets the `other` side, and records the
+    level in `stats`, if set.
+
+    Returns the next frontier and the first person also reached by
+    the `other` side, or None if the two searches have not met yet.
+    """
+    next_frontier = []
+    expanded = 0
+    scanned = 0
+    meeting = None
+    for person_id in frontier:
+        expanded += 1
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            scanned += 1
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor in other:
+                meeting = neighbor
+                break
+            next_frontier.append(neighbor)
+        if meeting is not None:
+            break
+
+    if stats is not None:
+        stats.scanned += scanned
+        stats.level(expanded, len(next_frontier) + (meeting is not None))
+    return next_frontier, meeting
+
 
 def person_id_for_name(name):
     """
@@ -159,11 +626,19 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(
+                    graph_index(person_id)
+                )}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
+    if stats is not None:
+        stats.allocations += 1
     return neighbors
 
 
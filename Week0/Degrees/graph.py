@@ -0,0 +1,914 @@
+import csv
+import math
+import mmap
+import os
+import struct
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+
+# Snapshot files cache a built Graph next to the CSV files it came from.
+# Bump SNAPSHOT_VERSION whenever the layout below changes.
+SNAPSHOT_FILE = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGRSNAP"
+SNAPSHOT_VERSION = 1
+
+# Integer arrays and string tables stored in a snapshot, in file order
+ARRAY_FIELDS = (
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+    "name_order"
+)
+STRING_FIELDS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+
+# Magic, version, (size, mtime) of each CSV file, then (offset, length)
+# of every array and of the offsets and bytes of every string table
+SNAPSHOT_HEADER = struct.Struct(
+    f"<8sq6q{2 * (len(ARRAY_FIELDS) + 2 * len(STRING_FIELDS))}q"
+)
+
+# Landmark files cache a LandmarkIndex the same way. Their header holds
+# magic, version, CSV key, landmark count and people count, followed by
+# the landmark indices (int32) and one row of distances (int16) each
+LANDMARK_FILE = "degrees.landmarks"
+LANDMARK_MAGIC = b"DEGRLMRK"
+LANDMARK_VERSION = 1
+LANDMARK_HEADER = struct.Struct("<8sq6qqq")
+
+
+class Graph():
+    """
+    Compact, read-only store of the people/movies graph.
+
+    People and movies are interned to dense integer indices (in order of
+    their IMDB id strings) and star edges are kept in compressed sparse row
+    form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`,
+    and the stars of movie `m` likewise live in `movie_people`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 name_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Person indices ordered by lowercase name, for name lookups
+        self.name_order = name_order
+
+        # Number of star rows left out when the graph was built
+        self.skipped_stars = 0
+
+    @classmethod
+    def from_directory(cls, directory):
+        """
+        Loads the graph for the CSV files in `directory` from its snapshot,
+        rebuilding the graph and rewriting the snapshot if the snapshot is
+        missing or older than the CSV files.
+        """
+        key = snapshot_key(directory)
+        path = os.path.join(directory, SNAPSHOT_FILE)
+        graph = cls.load(path, key)
+        if graph is None:
+            graph = cls.from_csv(directory, lazy=False)
+            try:
+                graph.save(path, key)
+            except OSError:
+                pass
+        return graph
+
+    @classmethod
+    def load(cls, path, key):
+        """
+        Memory-maps the snapshot at `path`.
+
+        Returns None if there is no snapshot, if it was written by a
+        different snapshot version or for CSV files other than `key`,
+        or if it is truncated.
+        """
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            header = SNAPSHOT_HEADER.unpack_from(buffer)
+        except struct.error:
+            buffer.close()
+            return None
+        if (header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_VERSION
+                or tuple(header[2:8]) != tuple(key)):
+            buffer.close()
+            return None
+
+        # Each section must lie within the file and hold whole items
+        typecodes = "i" * len(ARRAY_FIELDS) + "qB" * len(STRING_FIELDS)
+        layout = list(zip(header[8::2], header[9::2], typecodes))
+        for offset, length, typecode in layout:
+            if (offset < SNAPSHOT_HEADER.size or length < 0
+                    or offset + length > len(buffer)
+                    or length % struct.calcsize(typecode)):
+                buffer.close()
+                return None
+
+        view = memoryview(buffer)
+        sections = (view[offset:offset + length].cast(typecode)
+                    for offset, length, typecode in layout)
+
+        fields = {}
+        for field in ARRAY_FIELDS:
+            fields[field] = next(sections)
+        for field in STRING_FIELDS:
+            offsets = next(sections)
+            fields[field] = StringTable(offsets, next(sections))
+        return cls(**fields)
+
+    def save(self, path, key):
+        """
+        Writes the graph to a snapshot at `path`, tagged with the `key`
+        of the CSV files it was built from.
+        """
+        chunks = []
+        for field in ARRAY_FIELDS:
+            chunks.append(memoryview(loaded(getattr(self, field))).tobytes())
+        for field in STRING_FIELDS:
+            strings = loaded(getattr(self, field))
+            if not isinstance(strings, StringTable):
+                strings = StringTable.pack(strings)
+            chunks.append(memoryview(strings.offsets).tobytes())
+            chunks.append(memoryview(strings.blob).tobytes())
+
+        # Lay sections out after the header, each aligned to 8 bytes
+        layout = []
+        position = SNAPSHOT_HEADER.size
+        for chunk in chunks:
+            position += -position % 8
+            layout.extend((position, len(chunk)))
+            position += len(chunk)
+
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, *key, *layout
+            ))
+            for chunk in chunks:
+                f.write(bytes(-f.tell() % 8))
+                f.write(chunk)
+        os.replace(temporary, path)
+
+    @classmethod
+    def from_csv(cls, directory, lazy=True):
+        """
+        Builds a graph straight from the CSV files in `directory`,
+        streaming each file once into packed columns.
+
+        With `lazy`, names, births, titles and years are left out at
+        first, and read in one more pass over each file when first
+        used. That pass raises an Exception if the CSV files have
+        changed since the graph was built.
+        """
+        key = snapshot_key(directory)
+
+        def columns(filename, fields):
+            path = os.path.join(directory, filename)
+            if not lazy:
+                return pack_rows(read_csv(path, *fields), len(fields))
+
+            def load_rest():
+                if snapshot_key(directory) != key:
+                    raise Exception(
+                        f"{path} changed since its graph was built"
+                    )
+                return pack_rows(read_csv(path, *fields), len(fields))[1:]
+
+            (ids,) = pack_rows(read_csv(path, fields[0]), 1)
+            rest = LazyColumn(load_rest)
+            return [ids] + [LazyColumn(lambda i=i: rest.load()[i])
+                            for i in range(len(fields) - 1)]
+
+        stars = read_csv(
+            os.path.join(directory, "stars.csv"), "person_id", "movie_id"
+        )
+        return cls.assemble(
+            *columns("people.csv", ("id", "name", "birth")),
+            *columns("movies.csv", ("id", "title", "year")),
+            stars
+        )
+
+    @classmethod
+    def assemble(cls, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years, stars):
+        """
+        Builds a graph from packed columns of people and movies, sorted
+        by id, and an iterable of (person_id, movie_id) stars.
+
+        Stars that are malformed (None) or name an unknown person or
+        movie are skipped and counted in `skipped_stars`.
+        """
+        # Temporary id -> index maps, only needed while reading edges
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        edge_people = array("i")
+        edge_movies = array("i")
+        skipped = 0
+        for star in stars:
+            try:
+                person = person_index[star[0]]
+                movie = movie_index[star[1]]
+            except (KeyError, TypeError):
+                skipped += 1
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+        del person_index, movie_index
+
+        person_offsets, person_movies = compress(
+            len(person_ids), edge_people, edge_movies
+        )
+        movie_offsets, movie_people = compress(
+            len(movie_ids), edge_movies, edge_people
+        )
+        del edge_people, edge_movies
+
+        graph = cls(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            person_offsets, person_movies, movie_offsets, movie_people,
+            LazyColumn(lambda: order_by_name(person_names))
+        )
+        graph.skipped_stars = skipped
+        return graph
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDB id `person_id`, or None.
+        """
+        return find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDB id `movie_id`, or None.
+        """
+        return find(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indices of people whose name matches `name`,
+        ignoring case.
+        """
+        name = name.lower()
+        names = self.person_names
+        key = lambda i: names[i].lower()
+        start = bisect_left(self.name_order, name, key=key)
+        end = bisect_right(self.name_order, name, lo=start, key=key)
+        return list(self.name_order[start:end])
+
+    def movies_for(self, person):
+        """
+        Returns the indices of the movies a person starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Returns the indices of the people who starred in a movie.
+        """
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+    def shortest_path(self, source, target, landmarks=None, stats=None,
+                      components=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index,
+        using a bidirectional breadth-first search.
+
+        With a LandmarkIndex, pairs known to be disconnected are answered
+        at once. Search counters are added to `stats`, a
+        util.SearchStats, if given.
+
+        `components`, if given, is a dictionary labelling the people of
+        every connected component explored in full by earlier searches.
+        Pairs it separates are answered at once, and a search that runs
+        out of people on one side adds that side's component to it.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        if components is not None:
+            if components.get(source) is not components.get(target):
+                return None
+
+        if (landmarks is not None
+                and landmarks.lower_bound(source, target) == math.inf):
+            return None
+
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward, backward, stats
+                )
+            else:
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward, forward, stats
+                )
+
+            if meeting is not None:
+                return join_paths(meeting, forward, backward)
+
+        # The side that ran out has reached its whole component
+        if components is not None:
+            side = backward if forward_frontier else forward
+            components.update(dict.fromkeys(side, side))
+        return None
+
+    def distances_from(self, source):
+        """
+        Runs one level-synchronous breadth-first search from the source
+        index over the whole graph, returning a DistanceMap.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        size = len(person_offsets) - 1
+        distances = array("i", [-1]) * size
+        parent_movies = array("i", [-1]) * size
+        parent_people = array("i", [-1]) * size
+
+        distances[source] = 0
+        frontier = array("i", [source])
+        level = 0
+        while frontier:
+            level += 1
+            next_frontier = array("i")
+            for person in frontier:
+                for k in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[k]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if distances[neighbor] < 0:
+                            distances[neighbor] = level
+                            parent_movies[neighbor] = movie
+                            parent_people[neighbor] = person
+                            next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        return DistanceMap(source, distances, parent_movies, parent_people)
+
+    def expand_level(self, frontier, parents, other, stats=None):
+        """
+        Expands a whole BFS level of one side of a bidirectional search,
+        stopping as soon as it meets the `other` side, and records the
+        level in `stats`, if given.
+
+        Returns the next frontier and the first person also reached by
+        the `other` side, or None if the two searches have not met yet.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        next_frontier = []
+        expanded = 0
+        scanned = 0
+        meeting = None
+        for person in frontier:
+            expanded += 1
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                end = movie_offsets[movie + 1]
+                scanned += end - movie_offsets[movie]
+                for j in range(movie_offsets[movie], end):
+                    neighbor = movie_people[j]
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, person)
+                    if neighbor in other:
+                        meeting = neighbor
+                        scanned -= end - j - 1
+                        break
+                    next_frontier.append(neighbor)
+                if meeting is not None:
+                    break
+            if meeting is not None:
+                break
+
+        if stats is not None:
+            stats.scanned += scanned
+            stats.level(expanded, len(next_frontier)
+                        + (meeting is not None))
+        return next_frontier, meeting
+
+
+class LandmarkIndex():
+    """
+    Distance oracle built from full searches out of a few landmarks.
+
+    `rows[i][p]` is the degrees of separation between landmark `i` and
+    person `p`, or -1 if unreachable. By the triangle inequality, these
+    bound the separation of any pair of people from above and below.
+    """
+
+    def __init__(self, landmarks, rows):
+        self.landmarks = landmarks
+        self.rows = rows
+
+    @classmethod
+    def from_directory(cls, graph, directory, count):
+        """
+        Loads the index of `count` landmarks for the CSV files in
+        `directory`, building it from `graph` and rewriting the cached
+        copy if that is missing, stale or of a different size.
+        """
+        key = snapshot_key(directory)
+        path = os.path.join(directory, LANDMARK_FILE)
+        index = cls.load(path, key)
+        if index is None or len(index.landmarks) != count:
+            index = cls.build(graph, count)
+            try:
+                index.save(path, key)
+            except OSError:
+                pass
+        return index
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Searches out from `count` landmarks, chosen as the people with
+        the most movies who are not co-stars of an earlier landmark.
+        """
+        size = len(graph.person_offsets) - 1
+        offsets = graph.person_offsets
+        candidates = sorted(range(size),
+                            key=lambda p: offsets[p] - offsets[p + 1])
+
+        landmarks = array("i")
+        rows = []
+        for person in candidates:
+            if len(landmarks) == count:
+                break
+            if any(0 <= row[person] <= 1 for row in rows):
+                continue
+            landmarks.append(person)
+            rows.append(array("h", graph.distances_from(person).distances))
+        return cls(landmarks, rows)
+
+    @classmethod
+    def load(cls, path, key):
+        """
+        Memory-maps the landmark file at `path`, or returns None if it is
+        missing, truncated, or was written by another version or for
+        other CSV files.
+        """
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            header = LANDMARK_HEADER.unpack_from(buffer)
+        except struct.error:
+            buffer.close()
+            return None
+        if (header[0] != LANDMARK_MAGIC or header[1] != LANDMARK_VERSION
+                or tuple(header[2:8]) != tuple(key)):
+            buffer.close()
+            return None
+
+        count, size = header[8:10]
+        if (count < 0 or size < 0 or LANDMARK_HEADER.size
+                + 4 * count + 2 * count * size > len(buffer)):
+            buffer.close()
+            return None
+
+        view = memoryview(buffer)
+        start = LANDMARK_HEADER.size
+        landmarks = view[start:start + 4 * count].cast("i")
+        start += 4 * count
+        rows = []
+        for _ in range(count):
+            rows.append(view[start:start + 2 * size].cast("h"))
+            start += 2 * size
+        return cls(landmarks, rows)
+
+    def save(self, path, key):
+        """
+        Writes the index to `path`, tagged with the `key`
+        of the CSV files it was built from.
+        """
+        size = len(self.rows[0]) if self.rows else 0
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(LANDMARK_HEADER.pack(
+                LANDMARK_MAGIC, LANDMARK_VERSION, *key,
+                len(self.landmarks), size
+            ))
+            f.write(memoryview(self.landmarks).tobytes())
+            for row in self.rows:
+                f.write(memoryview(row).tobytes())
+        os.replace(temporary, path)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two people. A lower bound of infinity means they are
+        not connected; an upper bound of infinity means no landmark
+        reaches them.
+        """
+        if source == target:
+            return 0, 0
+        return self.lower_bound(source, target), self.upper_bound(
+            source, target
+        )
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the degrees of separation between
+        two people, or infinity if they are provably not connected.
+        """
+        lower = 0
+        for row in self.rows:
+            a = row[source]
+            b = row[target]
+            if (a < 0) != (b < 0):
+                return math.inf
+            if abs(a - b) > lower:
+                lower = abs(a - b)
+        return lower
+
+    def upper_bound(self, source, target):
+        """
+        Returns an upper bound on the degrees of separation between
+        two people, from the shortest route through a landmark.
+        """
+        upper = math.inf
+        for row in self.rows:
+            a = row[source]
+            b = row[target]
+            if a >= 0 and b >= 0 and a + b < upper:
+                upper = a + b
+        return upper
+
+
+class DistanceMap():
+    """
+    Result of a full breadth-first search from one source person.
+
+    `distances[p]` is the degrees of separation of person `p` from the
+    source, or -1 if unreachable, and `parent_movies[p]` and
+    `parent_people[p]` are the step that first reached `p`.
+    """
+
+    def __init__(self, source, distances, parent_movies, parent_people):
+        self.source = source
+        self.distances = distances
+        self.parent_movies = parent_movies
+        self.parent_people = parent_people
+
+    def distance(self, target):
+        """
+        Returns the degrees of separation of the target, or None.
+        """
+        distance = self.distances[target]
+        return None if distance < 0 else distance
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if self.distances[target] < 0:
+            return None
+
+        path = []
+        while target != self.source:
+            path.append((self.parent_movies[target], target))
+            target = self.parent_people[target]
+        path.reverse()
+        return path
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person]
+                      for person in graph.stars_for(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        people = graph.people_named(name)
+        if not people or name != name.lower():
+            raise KeyError(name)
+        return {graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        names = self.graph.person_names
+        previous = None
+        for person in self.graph.name_order:
+            name = names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings packed into one UTF-8 buffer, where string `i`
+    is `blob[offsets[i]:offsets[i + 1]]`. Strings are decoded on access.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def pack(cls, strings):
+        """
+        Packs an iterable of strings into a new StringTable.
+        """
+        table = cls(array("q", [0]), bytearray())
+        for string in strings:
+            table.append(string)
+        return table
+
+    def append(self, string):
+        """
+        Adds a string to the end of a table being packed.
+        """
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def permuted(self, order):
+        """
+        Returns a new StringTable holding the strings at positions
+        `order`, copied without decoding them.
+        """
+        offsets = self.offsets
+        table = StringTable(array("q", [0]), bytearray())
+        for i in order:
+            table.blob += self.blob[offsets[i]:offsets[i + 1]]
+            table.offsets.append(len(table.blob))
+        return table
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class LazyColumn(Sequence):
+    """
+    Sequence whose contents are only computed, by calling `loader`,
+    when first accessed.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.value = None
+
+    def load(self):
+        """
+        Returns the column's contents, computing them on first use.
+        """
+        if self.value is None:
+            self.value = self.loader()
+            self.loader = None
+        return self.value
+
+    def __getitem__(self, i):
+        return self.load()[i]
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+
+def loaded(column):
+    """
+    Returns the contents of a column, loading it if it is lazy.
+    """
+    if isinstance(column, LazyColumn):
+        return column.load()
+    return column
+
+
+def read_csv(path, *fields):
+    """
+    Streams a CSV file, yielding a tuple of the named `fields` of each
+    row, or None for a row with fewer fields than the header.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = [header.index(field) for field in fields]
+        for row in reader:
+            if len(row) >= len(header):
+                yield tuple(row[position] for position in positions)
+            else:
+                yield None
+
+
+def pack_rows(rows, width):
+    """
+    Packs each of the `width` fields of an iterable of rows into its own
+    StringTable, skipping None rows, then sorts them by the first field.
+    """
+    columns = [StringTable.pack(()) for _ in range(width)]
+    for row in rows:
+        if row is None:
+            continue
+        for column, value in zip(columns, row):
+            column.append(value)
+
+    ids = columns[0]
+    order = array("i", sorted(range(len(ids)), key=ids.__getitem__))
+    return [column.permuted(order) for column in columns]
+
+
+def order_by_name(names):
+    """
+    Returns the person indices ordered by lowercase name.
+    """
+    return array("i", sorted(range(len(names)),
+                             key=lambda i: names[i].lower()))
+
+
+def snapshot_key(directory):
+    """
+    Returns the (size, mtime) of each CSV file in `directory`,
+    identifying the data a snapshot was built from.
+    """
+    key = []
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        stat = os.stat(os.path.join(directory, filename))
+        key.extend((stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def compress(size, rows, columns):
+    """
+    Packs (row, column) edges into CSR offsets and column arrays,
+    with each row's columns sorted and deduplicated.
+    """
+    counts = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        counts[row + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+
+    slots = array("i", counts)
+    packed = array("i", bytes(4 * len(rows)))
+    for row, column in zip(rows, columns):
+        packed[slots[row]] = column
+        slots[row] += 1
+
+    offsets = array("i", [0])
+    values = array("i")
+    for row in range(size):
+        values.extend(sorted(set(packed[counts[row]:counts[row + 1]])))
+        offsets.append(len(values))
+    return offsets, values
+
+
+def find(ids, key):
+    """
+    Returns the position of `key` in the sorted sequence `ids`, or None.
+    """
+    i = bisect_left(ids, key)
+    if i < len(ids) and ids[i] == key:
+        return i
+    return None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search at `meeting`
+    into a single source-to-target list of (movie, person) pairs.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+
+    return path
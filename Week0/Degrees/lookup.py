@@ -0,0 +1,164 @@
+import math
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Ways of settling a name that matches several people without asking:
+# "strict" reports it as ambiguous, "popular" picks whoever has starred
+# in the most movies
+POLICIES = ("strict", "popular")
+
+# Smallest share of a query's trigrams a fuzzy match must contain
+MIN_SIMILARITY = 0.5
+
+# How many times longer than the set of candidates a posting list must
+# be for `similar` to binary search it per candidate rather than scan it
+SEARCH_RATIO = 16
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over the lowercase names of a `names` map.
+
+    `keys` is every distinct name in sorted order, so names starting with
+    a prefix form one contiguous run. `postings` maps each trigram to the
+    positions in `keys` of the names containing it, in increasing order,
+    and `sizes` holds the number of distinct trigrams of each name.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.keys = sorted(names)
+        self.postings = None
+        self.sizes = None
+
+    def prefixed(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(prefix)):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def similar(self, name, limit=10):
+        """
+        Returns up to `limit` names sharing most of the trigrams of
+        `name`, best match first, and of equal matches those closest
+        in length to `name`.
+        """
+        if self.postings is None:
+            self.index()
+
+        name = name.lower()
+        query = trigrams(name)
+        if not query or limit <= 0:
+            return []
+        ordered = sorted(query, key=lambda t: len(self.postings.get(t, ())))
+        floor = math.ceil(MIN_SIMILARITY * len(query))
+
+        # Names sharing many trigrams are found cheaply, from the rarest
+        # postings alone, so start halfway to the floor and only ask for
+        # fewer if a name sharing fewer could still make the list
+        needed = (len(query) + floor + 1) // 2
+        while True:
+            scored = sorted(
+                (-2 * count / (len(query) + self.sizes[i]),
+                 abs(len(self.keys[i]) - len(name)), self.keys[i])
+                for i, count in self.sharing(ordered, needed).items()
+            )
+
+            # A name sharing c trigrams scores at most 2c / (len + c), so
+            # one sharing fewer than `least` scores below the last found
+            least = floor
+            if len(scored) >= limit:
+                score = -scored[limit - 1][0]
+                least = max(floor, math.ceil(
+                    score * len(query) / (2 - score) - 1e-9
+                ))
+            if least >= needed:
+                return [key for _, _, key in scored[:limit]]
+            needed = least
+
+    def sharing(self, ordered, needed):
+        """
+        Returns a Counter of how many of the trigrams `ordered` (rarest
+        first) each name shares, for the positions in `keys` of the names
+        sharing at least `needed` of them.
+        """
+
+        # A name sharing `needed` trigrams must contain at least one of
+        # the len(ordered) - needed + 1 rarest, so only names in those
+        # postings are candidates
+        short = len(ordered) - needed + 1
+        shared = Counter()
+        for trigram in ordered[:short]:
+            shared.update(self.postings.get(trigram, ()))
+        candidates = set(shared)
+
+        for k, trigram in enumerate(ordered[short:]):
+            posting = self.postings.get(trigram, ())
+            if len(posting) <= SEARCH_RATIO * len(candidates):
+                shared.update(candidates.intersection(posting))
+                continue
+
+            # Search the long posting for each candidate that could still
+            # share `needed` trigrams, dropping the rest
+            remaining = len(ordered) - short - k
+            for i in list(candidates):
+                count = shared[i]
+                if count + remaining < needed:
+                    candidates.discard(i)
+                    del shared[i]
+                    continue
+                j = bisect_left(posting, i)
+                if j < len(posting) and posting[j] == i:
+                    shared[i] = count + 1
+
+        return Counter({i: count for i, count in shared.items()
+                        if count >= needed})
+
+    def candidates(self, name, limit=10):
+        """
+        Returns up to `limit` names for `name`, ranked: the exact name,
+        then names it is a prefix of, then similarly spelled names.
+        """
+        name = name.lower()
+        ranked = []
+        for key in (
+            ([name] if name in self.names else [])
+            + self.prefixed(name, limit)
+            + self.similar(name, limit)
+        ):
+            if key not in ranked:
+                ranked.append(key)
+        return ranked[:limit]
+
+    def index(self):
+        """
+        Builds the trigram postings, on first use of `similar`.
+        """
+        postings = {}
+        sizes = array("i")
+        for i, key in enumerate(self.keys):
+            grams = trigrams(key)
+            for trigram in grams:
+                if trigram not in postings:
+                    postings[trigram] = array("i")
+                postings[trigram].append(i)
+            sizes.append(len(grams))
+        self.postings = postings
+        self.sizes = sizes
+
+
+def trigrams(name):
+    """
+    Returns the set of three-character substrings of a padded name.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -1,3 +1,8 @@
+import time
+
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Maps each state in the frontier to how many nodes hold it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,9 +30,18 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            return self.forget(self.frontier.pop())
+
+    def forget(self, node):
+        """
+        Drops one occurrence of the node's state from the membership counts.
+        """
+        count = self.states[node.state]
+        if count == 1:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count - 1
+        return node
 
 
 class QueueFrontier(StackFrontier):
@@ -33,6 +50,79 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+            return self.forget(self.frontier.popleft())
+
+
+class SearchStats():
+    """
+    Counters filled in by the searches it is handed to, summed over
+    every query they answer:
+        - `expanded`: people whose neighbors were generated
+        - `reached`: people added to a frontier
+        - `scanned`: (movie, person) neighbor pairs looked at
+        - `allocations`: neighbor sets built by neighbors_for_person
+        - `frontier_peak`: the largest frontier seen
+        - `latencies`: wall time, in seconds, of each query
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.reached = 0
+        self.scanned = 0
+        self.allocations = 0
+        self.frontier_peak = 0
+        self.latencies = []
+        self.started = None
+
+    def start(self):
+        """
+        Marks the start of a query.
+        """
+        self.started = time.perf_counter()
+
+    def stop(self):
+        """
+        Marks the end of the query started last.
+        """
+        self.latencies.append(time.perf_counter() - self.started)
+
+    def level(self, expanded, reached):
+        """
+        Records one expanded BFS level.
+        """
+        self.expanded += expanded
+        self.reached += reached
+        if reached > self.frontier_peak:
+            self.frontier_peak = reached
+
+    def frontier(self, size):
+        """
+        Records the current size of a frontier.
+        """
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+
+    def percentile(self, p):
+        """
+        Returns the `p`th percentile query latency, in seconds.
+        """
+        if not self.latencies:
+            return 0
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    def summary(self):
+        """
+        Returns a dictionary of totals and latency percentiles.
+        """
+        return {
+            "queries": len(self.latencies),
+            "seconds": sum(self.latencies),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "expanded": self.expanded,
+            "reached": self.reached,
+            "scanned": self.scanned,
+            "allocations": self.allocations,
+            "frontier_peak": self.frontier_peak
+        }
@@ -0,0 +1,187 @@
+import argparse
+import random
+import sys
+import time
+
+import bitboard
+import tictactoe as ttt
+
+# Players the benchmark can pit against each other: "minimax" answers
+# from the opening book, while "solve" and "states" search without it,
+# through the cached solve() and the list-based max_state/min_state
+ENGINES = ("minimax", "solve", "states", "alphabeta", "bitboard", "random")
+
+# Leaf counts of the classic 3x3 game tree at each depth, for checking
+# the move generator (games that end early stop being counted)
+PERFT = [1, 9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark tictactoe.py players and move generation."
+    )
+    parser.add_argument("--depth", type=int, default=9,
+                        help="deepest perft count")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games played per match")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=[engine for engine in ENGINES
+                                 if engine != "random"])
+    args = parser.parse_args()
+
+    failures = []
+
+    for depth in range(args.depth + 1):
+        start = time.perf_counter()
+        nodes = perft(ttt.initial_state(), depth)
+        seconds = time.perf_counter() - start
+        print(f"perft({depth}) = {nodes} "
+              f"in {seconds:.3f}s ({nodes / seconds:.0f} nodes/s)")
+        if depth < len(PERFT) and nodes != PERFT[depth]:
+            failures.append(f"perft({depth}) should be {PERFT[depth]}")
+
+    for engine in args.engines:
+        if engine == "random":
+            continue
+        mistakes = check(engine)
+        print(f"{engine}: {mistakes} mistakes over every reachable position")
+        if mistakes:
+            failures.append(f"{engine} plays suboptimal moves")
+
+    rng = random.Random(args.seed)
+    for engine in args.engines:
+        for opponent in ("random", engine):
+            if engine == opponent == "random":
+                continue
+            results, latencies = match(engine, opponent, args.games, rng)
+            report(engine, opponent, results, latencies)
+            if engine != "random" and results["losses"]:
+                failures.append(f"{engine} lost to {opponent}")
+            if opponent == engine and results["wins"] + results["losses"]:
+                failures.append(f"{engine} does not draw against itself")
+
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+def perft(board, depth):
+    """
+    Returns the number of positions reached by playing `depth` moves
+    from `board`, not counting games that ended sooner.
+    """
+    if depth == 0:
+        return 1
+    if ttt.terminal(board):
+        return 0
+    return sum(perft(ttt.result(board, action), depth - 1)
+               for action in ttt.actions(board))
+
+
+def choose(engine, board, rng):
+    """
+    Returns the move `engine` plays on `board`.
+    """
+    if engine == "minimax":
+        return ttt.minimax(board)
+    if engine == "solve":
+        return ttt.solve(ttt.board_key(board))[1]
+    if engine == "states":
+        if ttt.player(board) == ttt.X:
+            return ttt.max_state(board)[1]
+        return ttt.min_state(board)[1]
+    if engine == "alphabeta":
+        return ttt.alphabeta(board)
+    if engine == "bitboard":
+        return bitboard.minimax(board)
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def check(engine):
+    """
+    Returns how many reachable positions `engine` answers with a move
+    that loses value, judged by a plain minimax recursion over the rules.
+    """
+    values = {}
+
+    def solved(board):
+        key = ttt.board_key(board)
+        if key not in values:
+            if ttt.terminal(board):
+                values[key] = ttt.utility(board)
+            else:
+                scores = [solved(ttt.result(board, action))
+                          for action in ttt.actions(board)]
+                values[key] = (max(scores) if ttt.player(board) == ttt.X
+                               else min(scores))
+        return values[key]
+
+    solved(ttt.initial_state())
+
+    mistakes = 0
+    for key in list(values):
+        board = [list(row) for row in key]
+        if ttt.terminal(board):
+            continue
+        move = choose(engine, board, None)
+        if solved(ttt.result(board, move)) != values[key]:
+            mistakes += 1
+    return mistakes
+
+
+def match(engine, opponent, games, rng):
+    """
+    Plays `games` games of `engine` against `opponent`, taking turns to
+    play X.
+
+    Returns the engine's wins, losses and ties, and the seconds each of
+    its moves took.
+    """
+    results = {"wins": 0, "losses": 0, "ties": 0}
+    latencies = []
+    for game in range(games):
+        mark = ttt.X if game % 2 == 0 else ttt.O
+        board = ttt.initial_state()
+        while not ttt.terminal(board):
+            if ttt.player(board) == mark:
+                start = time.perf_counter()
+                move = choose(engine, board, rng)
+                latencies.append(time.perf_counter() - start)
+            else:
+                move = choose(opponent, board, rng)
+            board = ttt.result(board, move)
+
+        winner = ttt.winner(board)
+        if winner is None:
+            results["ties"] += 1
+        elif winner == mark:
+            results["wins"] += 1
+        else:
+            results["losses"] += 1
+    return results, latencies
+
+
+def percentile(latencies, p):
+    """
+    Returns the `p`th percentile of `latencies`.
+    """
+    if not latencies:
+        return 0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+
+def report(engine, opponent, results, latencies):
+    """
+    Prints the results of one match.
+    """
+    print(f"{engine} vs {opponent}: {results['wins']} wins, "
+          f"{results['losses']} losses, {results['ties']} ties")
+    print(f"    {len(latencies)} moves, "
+          f"p50 {percentile(latencies, 50) * 1000:.3f}ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.3f}ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
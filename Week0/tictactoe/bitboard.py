@@ -0,0 +1,150 @@
+"""
+Tic Tac Toe on bitboards
+
+A board is a pair of 9-bit integers `(x, o)`, one per player, where bit
+`3 * i + j` is set when that player has a mark on tile (i, j).
+"""
+
+import functools
+
+import tictactoe as ttt
+
+FULL = (1 << 9) - 1
+
+# Bit masks of the three rows, three columns and two diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# WINS[marks] is True when a player holding `marks` has three in a row
+WINS = [any(marks & mask == mask for mask in WIN_MASKS)
+        for marks in range(FULL + 1)]
+
+# Squares in the order the search tries them: center, corners, edges,
+# as in tictactoe.move_order(3, 3, 3)
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board.
+    """
+    x = 0
+    o = 0
+    for i, row in enumerate(board):
+        for j, tile in enumerate(row):
+            if tile == ttt.X:
+                x |= 1 << (3 * i + j)
+            elif tile == ttt.O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of a pair of bitboards.
+    """
+    board = ttt.initial_state()
+    for square in range(9):
+        if x >> square & 1:
+            board[square // 3][square % 3] = ttt.X
+        elif o >> square & 1:
+            board[square // 3][square % 3] = ttt.O
+    return board
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return ttt.O if x.bit_count() > o.bit_count() else ttt.X
+
+
+def actions(x, o):
+    """
+    Returns the empty squares (as bit positions), most promising first.
+    """
+    taken = x | o
+    return [square for square in MOVE_ORDER if not taken >> square & 1]
+
+
+def result(x, o, square):
+    """
+    Returns the bitboards after the current player marks `square`.
+    """
+    if (x | o) >> square & 1:
+        raise Exception("Invalid action")
+    if x.bit_count() > o.bit_count():
+        return x, o | 1 << square
+    return x | 1 << square, o
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[x]:
+        return ttt.X
+    if WINS[o]:
+        return ttt.O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+@functools.lru_cache(maxsize=None)
+def value(x, o):
+    """
+    Returns the minimax score of a position (1 if X wins with best play,
+    -1 if O does, 0 for a tie), solving each position once.
+    """
+    if terminal(x, o):
+        return utility(x, o)
+
+    scores = [value(*result(x, o, square)) for square in actions(x, o)]
+    if x.bit_count() > o.bit_count():
+        return min(scores)
+    return max(scores)
+
+
+def best_action(x, o):
+    """
+    Returns the square of an optimal move for the current player,
+    or None if the game is over.
+    """
+    if terminal(x, o):
+        return None
+
+    moves = actions(x, o)
+    if x.bit_count() > o.bit_count():
+        return min(moves, key=lambda square: value(*result(x, o, square)))
+    return max(moves, key=lambda square: value(*result(x, o, square)))
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a
+    list-of-lists board, searching its bitboard form.
+    """
+    square = best_action(*from_board(board))
+    if square is None:
+        return None
+    return square // 3, square % 3
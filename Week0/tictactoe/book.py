@@ -0,0 +1,123 @@
+"""
+Tic Tac Toe Opening Book
+
+Optimal moves for every reachable position, with positions that are
+rotations or reflections of one another stored once. Entries are
+`key << 4 | square`, where `key` is the canonical position's X marks
+plus its O marks shifted 9 bits up, and `square` is its best move.
+"""
+
+import os
+import sys
+
+from array import array
+from bisect import bisect_left
+
+import bitboard
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# The 8 symmetries of the board, as the square each square moves to
+SYMMETRIES = [
+    [3 * i + j for i in range(3) for j in range(3)],
+    [3 * j + 2 - i for i in range(3) for j in range(3)],
+    [3 * (2 - i) + 2 - j for i in range(3) for j in range(3)],
+    [3 * (2 - j) + i for i in range(3) for j in range(3)],
+    [3 * i + 2 - j for i in range(3) for j in range(3)],
+    [3 * (2 - i) + j for i in range(3) for j in range(3)],
+    [3 * j + i for i in range(3) for j in range(3)],
+    [3 * (2 - j) + 2 - i for i in range(3) for j in range(3)]
+]
+
+# TRANSFORMS[k][marks] is `marks` moved by symmetry `k`
+TRANSFORMS = [
+    [sum(1 << symmetry[square] for square in range(9) if marks >> square & 1)
+     for marks in range(1 << 9)]
+    for symmetry in SYMMETRIES
+]
+
+# Sorted book entries, read from BOOK_FILE on first lookup
+entries = None
+
+
+def canonical(x, o):
+    """
+    Returns the key of the canonical form of a position, and the
+    symmetry that maps the position onto it.
+    """
+    return min((transform[x] | transform[o] << 9, k)
+               for k, transform in enumerate(TRANSFORMS))
+
+
+def generate():
+    """
+    Returns the sorted book entries, solving every reachable position.
+    """
+    book = {}
+    stack = [(0, 0)]
+    seen = set()
+    while stack:
+        x, o = stack.pop()
+        key, _ = canonical(x, o)
+        if key in seen or bitboard.terminal(x, o):
+            continue
+        seen.add(key)
+
+        canonical_x = key & bitboard.FULL
+        canonical_o = key >> 9
+        book[key] = bitboard.best_action(canonical_x, canonical_o)
+        for square in bitboard.actions(x, o):
+            stack.append(bitboard.result(x, o, square))
+
+    return array("I", sorted(key << 4 | square for key, square in book.items()))
+
+
+def save(book, path=BOOK_FILE):
+    """
+    Writes book entries to `path` as little-endian 32-bit integers.
+    """
+    book = array("I", book)
+    if sys.byteorder == "big":
+        book.byteswap()
+    with open(path, "wb") as f:
+        f.write(book.tobytes())
+
+
+def load(path=BOOK_FILE):
+    """
+    Reads book entries from `path`, or generates them if it is missing.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return generate()
+
+    book = array("I")
+    book.frombytes(data)
+    if sys.byteorder == "big":
+        book.byteswap()
+    return book
+
+
+def lookup(board):
+    """
+    Returns the book's optimal action (i, j) for the current player,
+    or None if the position is over or not in the book.
+    """
+    global entries
+    if entries is None:
+        entries = load()
+
+    x, o = bitboard.from_board(board)
+    key, k = canonical(x, o)
+    i = bisect_left(entries, key << 4)
+    if i == len(entries) or entries[i] >> 4 != key:
+        return None
+
+    square = SYMMETRIES[k].index(entries[i] & 0xF)
+    return square // 3, square % 3
+
+
+if __name__ == "__main__":
+    save(generate())
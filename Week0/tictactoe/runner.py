@@ -1,9 +1,15 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
 
+if len(sys.argv) == 4:
+    ttt.configure(*[int(arg) for arg in sys.argv[1:]])
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [rows columns k]")
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -11,15 +17,48 @@ size = width, height = 600, 400
 black = (0, 0, 0)
 white = (255, 255, 255)
 
+# Frames drawn per second, and the least time the computer appears to think
+FPS = 30
+AI_DELAY = 0.5
+
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+
+class Search():
+    """
+    Computes the AI move for `board` on a background thread, so the
+    window keeps drawing while it thinks. `depth` is the deepest search
+    finished so far, and `move` is set once the search is done.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.started = time.monotonic()
+        self.depth = 0
+        self.move = None
+        self.done = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        self.move = ttt.minimax(self.board, progress=self.update)
+        self.done = True
+
+    def update(self, depth, action):
+        self.depth = depth
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+search = None
 
 while True:
 
@@ -67,13 +106,15 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        rows = len(board)
+        columns = len(board[0])
+        tile_size = min(80, 280 // max(rows, columns))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -102,7 +143,7 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            title = "Computer thinking" + "." * (int(time.monotonic() * 2) % 4)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,20 +151,26 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if search is None:
+                search = Search(board)
+            elif search.done and search.elapsed() >= AI_DELAY:
+                board = ttt.result(board, search.move)
+                search = None
             else:
-                ai_turn = True
+                status = f"{search.elapsed():.1f}s"
+                if search.depth:
+                    status += f", searched {search.depth} moves ahead"
+                status = mediumFont.render(status, True, white)
+                statusRect = status.get_rect()
+                statusRect.center = ((width / 2), height - 30)
+                screen.blit(status, statusRect)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -141,6 +188,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    search = None
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -3,20 +3,55 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import functools
+import time
+
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Board size of new games, and marks in a row needed to win
+ROWS = 3
+COLUMNS = 3
+K = 3
+
+# Maximum number of solved positions remembered by `solve`
+CACHE_SIZE = 1 << 16
+
+# Directions a line of marks can run in: across, down and both diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# Seconds minimax may think about a move on boards it cannot solve outright
+TIME_BUDGET = 1.0
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search once its deadline has passed.
+    """
+
+
+def configure(rows, columns, k):
+    """
+    Sets up games on a `rows` x `columns` board, won by `k` in a row.
+    """
+    global ROWS, COLUMNS, K
+
+    if k > max(rows, columns):
+        raise Exception("k does not fit on the board")
+    ROWS = rows
+    COLUMNS = columns
+    K = k
+    solve.cache_clear()
+
 
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * COLUMNS for _ in range(ROWS)]
 
 
 def player(board):
@@ -45,8 +80,8 @@ def actions(board):
     """
     actions = set()
 
-    for row in range(3):
-        for tile in range(3):
+    for row in range(len(board)):
+        for tile in range(len(board[row])):
             if board[row][tile] is EMPTY:
                 actions.add((row, tile))
 
@@ -57,7 +92,7 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    new_state = copy.deepcopy(board)
+    new_state = [row[:] for row in board]
 
     new_state[action[0]][action[1]] = player(board)
 
@@ -68,39 +103,45 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    checks = set(board[0])
-    if (len(checks)) == 1:
-        return board[0][0]
-
-    checks = set(board[1])
-    if (len(checks)) == 1:
-        return board[1][0]
-
-    checks = set(board[2])
-    if (len(checks)) == 1:
-        return board[2][0]
+    for line in windows(len(board), len(board[0]), K):
+        i, j = line[0]
+        mark = board[i][j]
+        if mark is EMPTY:
+            continue
+        for i, j in line:
+            if board[i][j] != mark:
+                break
+        else:
+            return mark
 
-    checks = set([board[0][0], board[1][0], board[2][0]])
-    if (len(checks)) == 1:
-        return board[0][0]
-
-    checks = set([board[0][1], board[1][1], board[2][1]])
-    if (len(checks)) == 1:
-        return board[0][1]
+    return None
 
-    checks = set([board[0][2], board[1][2], board[2][2]])
-    if (len(checks)) == 1:
-        return board[0][2]
 
-    checks = set([board[0][0], board[1][1], board[2][2]])
-    if (len(checks)) == 1:
-        return board[0][0]
+def wins_at(board, action):
+    """
+    Returns True if the mark at `action` is part of K in a row,
+    looking only at the lines through that tile.
+    """
+    i, j = action
+    mark = board[i][j]
+    rows = len(board)
+    columns = len(board[0])
+
+    for di, dj in DIRECTIONS:
+        count = 1
+        for step in (1, -1):
+            row = i + step * di
+            column = j + step * dj
+            while (0 <= row < rows and 0 <= column < columns
+                   and board[row][column] == mark):
+                count += 1
+                row += step * di
+                column += step * dj
+        if count >= K:
+            return True
+
+    return False
 
-    checks = set([board[0][2], board[1][1], board[2][0]])
-    if (len(checks)) == 1:
-        return board[0][2]
-
-    return None
 
 def terminal(board):
     """
@@ -139,7 +180,7 @@ def max_state(board):
     act = None
 
     for action in actions(board):
-        score, temp_act = min_state(result(board, action))
+        score, temp_act = solve(board_key(result(board, action)))
         if score > max_score:
             max_score = score
             act = action
@@ -156,7 +197,7 @@ def min_state(board):
     act = None
 
     for action in actions(board):
-        score, temp_act = max_state(result(board, action))
+        score, temp_act = solve(board_key(result(board, action)))
         if score < min_score:
             min_score = score
             act = action
@@ -166,16 +207,230 @@ def min_state(board):
     return min_score, act
 
 
-def minimax(board):
+def board_key(board):
+    """
+    Returns a hashable encoding of the board: a tuple of its rows.
+    """
+    return tuple(tuple(row) for row in board)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def solve(key):
+    """
+    Returns the (score, action) minimax solution of the board encoded
+    as `key`, so each position is only searched once per process.
+    """
+    board = [list(row) for row in key]
+
+    if player(board) == X:
+        return max_state(board)
+    return min_state(board)
+
+
+def minimax(board, progress=None):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    from the opening book when the position is in it.
+
+    Only the classic 3x3 game is fully solved and cached; on other
+    boards this is the best move found within TIME_BUDGET seconds,
+    reported to `progress` as in iterative_deepening.
     """
     if terminal(board):
         return None
-    
-    if player(board) == X:
-        _, act = max_state(board)
+
+    if (len(board), len(board[0]), K) != (3, 3, 3):
+        return iterative_deepening(board, TIME_BUDGET, progress)
+
+    act = book.lookup(board)
+    if act is not None:
         return act
-    
-    _, act = min_state(board)
+
+    _, act = solve(board_key(board))
+    return act
+
+
+@functools.lru_cache(maxsize=None)
+def move_order(rows, columns, k):
+    """
+    Returns every tile of a `rows` x `columns` board, ordered by how many
+    possible lines of `k` pass through it, most first. On the 3x3 board
+    this tries the center, then the corners, then the edges.
+    """
+    lines = {(i, j): 0 for i in range(rows) for j in range(columns)}
+    for i, j in lines:
+        for di, dj in DIRECTIONS:
+            end = (i + (k - 1) * di, j + (k - 1) * dj)
+            if end in lines:
+                for step in range(k):
+                    lines[(i + step * di, j + step * dj)] += 1
+
+    return sorted(lines, key=lambda tile: -lines[tile])
+
+
+@functools.lru_cache(maxsize=None)
+def windows(rows, columns, k):
+    """
+    Returns every line of `k` tiles on a `rows` x `columns` board.
+    """
+    lines = []
+    for i in range(rows):
+        for j in range(columns):
+            for di, dj in DIRECTIONS:
+                end = (i + (k - 1) * di, j + (k - 1) * dj)
+                if 0 <= end[0] < rows and 0 <= end[1] < columns:
+                    lines.append([(i + step * di, j + step * dj)
+                                  for step in range(k)])
+    return lines
+
+
+def evaluate(board):
+    """
+    Returns a heuristic score strictly between -1 and 1, positive when
+    X looks better placed. Each line still open to only one player
+    counts for that player, and far more the more marks it holds.
+    """
+    score = 0
+    for line in windows(len(board), len(board[0]), K):
+        x = 0
+        o = 0
+        for i, j in line:
+            if board[i][j] == X:
+                x += 1
+            elif board[i][j] == O:
+                o += 1
+        if o == 0 and x > 0:
+            score += 4 ** x
+        elif x == 0 and o > 0:
+            score -= 4 ** o
+
+    return score / (abs(score) + 4 ** K)
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board, most promising first.
+    """
+    return [(i, j) for i, j in move_order(len(board), len(board[0]), K)
+            if board[i][j] is EMPTY]
+
+
+def alphabeta_state(board, mark, last, alpha, beta,
+                    depth=None, deadline=None, first=None, moves=None):
+    """
+    Returns the (score, action) of the best move for `mark`, the player
+    to move, after the previous player moved at `last` (or None).
+    Only scores strictly between `alpha` and `beta` are exact.
+
+    Moves are made and undone on `board` itself, and only the lines
+    through `last` are checked for a win. With a `depth`, positions that
+    many moves ahead are scored by `evaluate`. With a `deadline` (from
+    time.monotonic), SearchTimeout is raised once it has passed. The
+    action `first` is tried before all others.
+
+    `moves` lists the empty tiles, most promising first; it defaults to
+    `ordered_actions(board)`. Each move is taken out of the list while
+    its reply is searched and put back after, so the board is never
+    scanned below the root.
+    """
+    if last is not None and wins_at(board, last):
+        return (1 if board[last[0]][last[1]] == X else -1), None
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout()
+
+    if moves is None:
+        moves = ordered_actions(board)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+    if not moves:
+        return 0, None
+    if depth == 0:
+        return evaluate(board), None
+    if depth is not None:
+        depth -= 1
+
+    act = None
+    other = O if mark == X else X
+
+    if mark == X:
+        max_score = -math.inf
+        for i in range(len(moves)):
+            action = moves.pop(i)
+            board[action[0]][action[1]] = X
+            score, _ = alphabeta_state(board, other, action, alpha, beta,
+                                       depth, deadline, None, moves)
+            board[action[0]][action[1]] = EMPTY
+            moves.insert(i, action)
+            if score > max_score:
+                max_score = score
+                act = action
+            alpha = max(alpha, max_score)
+            if alpha >= beta:
+                break
+        return max_score, act
+
+    min_score = math.inf
+    for i in range(len(moves)):
+        action = moves.pop(i)
+        board[action[0]][action[1]] = O
+        score, _ = alphabeta_state(board, other, action, alpha, beta,
+                                   depth, deadline, None, moves)
+        board[action[0]][action[1]] = EMPTY
+        moves.insert(i, action)
+        if score < min_score:
+            min_score = score
+            act = action
+        beta = min(beta, min_score)
+        if alpha >= beta:
+            break
+    return min_score, act
+
+
+def alphabeta(board):
+    """
+    Returns an optimal action for the current player on the board,
+    found by alpha-beta search with the most central moves tried first.
+    """
+    if terminal(board):
+        return None
+
+    board = [row[:] for row in board]
+    _, act = alphabeta_state(board, player(board), None, -math.inf, math.inf)
     return act
+
+
+def iterative_deepening(board, budget, progress=None):
+    """
+    Returns the best action for the current player found by searching
+    one move deeper at a time until `budget` seconds have passed, or
+    until the game has been searched to the end or its outcome proven.
+
+    Each search starts from the best move of the one before, and a
+    search cut short by the deadline is discarded, so the result is
+    always the choice of the deepest completed search. If given,
+    `progress(depth, action)` is called after each completed search.
+    """
+    if terminal(board):
+        return None
+
+    deadline = time.monotonic() + budget
+    board = [row[:] for row in board]
+    mark = player(board)
+    moves = ordered_actions(board)
+    best = moves[0]
+
+    for depth in range(1, len(moves) + 1):
+        try:
+            score, act = alphabeta_state(board, mark, None,
+                                         -math.inf, math.inf,
+                                         depth, deadline, best)
+        except SearchTimeout:
+            break
+        best = act
+        if progress is not None:
+            progress(depth, best)
+        if abs(score) == 1:
+            break
+
+    return best
@@ -1,19 +1,124 @@
+import functools
+import heapq
+import inspect
 import itertools
+import multiprocessing
+import weakref
 
+# Models evaluated at once by model_check, as the bits of one integer
+TABLE_BITS = 16
 
-class Sentence():
+# Parts the models are split into per worker process, so that workers
+# finishing early can take on more
+PARTS_PER_WORKER = 4
 
-    def evaluate(self, model):
-        """Evaluates the logical sentence."""
+
+class Interned(type):
+    """
+    Makes building a sentence return the existing sentence of the same
+    class and parts, if there is one, so that equal sentences (and equal
+    subformulas) are a single shared object.
+    """
+
+    def __call__(cls, *parts, **named):
+        if named:
+            parts = cls.positional(parts, named)
+        key = (cls,) + parts
+        try:
+            sentence = Sentence.interned.get(key)
+        except TypeError:
+            # Unhashable parts are not sentences; building the sentence
+            # lets its own validation say what is wrong with them
+            key = None
+            sentence = None
+        if sentence is None:
+            sentence = super().__call__(*parts)
+            sentence.parts = parts
+            if key is not None:
+                Sentence.interned[key] = sentence
+        return sentence
+
+    def positional(cls, parts, named):
+        """
+        Returns the parts of a sentence built with keyword arguments as
+        the positional parts its constructor would be called with.
+        """
+        bound = inspect.signature(cls.__init__).bind(None, *parts, **named)
+        positional = []
+        for name, value in list(bound.arguments.items())[1:]:
+            kind = bound.signature.parameters[name].kind
+            if kind == inspect.Parameter.VAR_POSITIONAL:
+                positional.extend(value)
+            else:
+                positional.append(value)
+        return tuple(positional)
+
+
+def memoized(evaluate):
+    """
+    Makes a sentence's evaluation method, when passed a `cache` dict,
+    look up and store its result there, so that a subformula shared by
+    several parts of a sentence is evaluated only once per model.
+    """
+    @functools.wraps(evaluate)
+    def wrapper(self, *args, cache=None):
+        if cache is None:
+            return evaluate(self, *args)
+        if self not in cache:
+            cache[self] = evaluate(self, *args, cache=cache)
+        return cache[self]
+    return wrapper
+
+
+class Sentence(metaclass=Interned):
+    """
+    Sentences are immutable: equal sentences are the same object, with
+    their hash and symbols computed once, when built.
+    """
+
+    # Every sentence in use, by its class and parts
+    interned = weakref.WeakValueDictionary()
+
+    # Names of the symbols in the sentence
+    atoms = frozenset()
+
+    def __hash__(self):
+        return self.digest
+
+    def __reduce__(self):
+        return type(self), self.parts
+
+    def evaluate(self, model, cache=None):
+        """
+        Evaluates the logical sentence. Results of subformulas are kept in
+        `cache`, if given, which must only be reused for the same model.
+        """
+        raise Exception("nothing to evaluate")
+
+    def table(self, tables, full, cache=None):
+        """
+        Evaluates the logical sentence in many models at once. `tables`
+        maps each symbol to an integer whose bit m is set when the symbol
+        is true in model m, and `full` has a bit set for every model.
+        Returns the integer of models in which the sentence is true. As
+        with evaluate, subformula results are kept in `cache`, if given.
+        """
         raise Exception("nothing to evaluate")
 
+    def encode(self, cnf):
+        """
+        Adds clauses to `cnf` defining a new variable as equivalent to
+        the logical sentence, and returns the literal of that variable.
+        """
+        raise Exception("nothing to encode")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.atoms)
 
     @classmethod
     def validate(cls, sentence):
@@ -46,65 +151,66 @@ class Symbol(Sentence):
 
     def __init__(self, name):
         self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+        self.digest = hash(("symbol", name))
+        self.atoms = frozenset([name])
 
     def __repr__(self):
         return self.name
 
-    def evaluate(self, model):
+    def evaluate(self, model, cache=None):
         try:
             return bool(model[self.name])
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def table(self, tables, full, cache=None):
+        try:
+            return tables[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def encode(self, cnf):
+        return cnf.variable()
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
-
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        self.digest = hash(("not", hash(operand)))
+        self.atoms = operand.atoms
 
     def __repr__(self):
         return f"Not({self.operand})"
 
-    def evaluate(self, model):
-        return not self.operand.evaluate(model)
+    @memoized
+    def evaluate(self, model, cache=None):
+        return not self.operand.evaluate(model, cache=cache)
+
+    @memoized
+    def table(self, tables, full, cache=None):
+        return full ^ self.operand.table(tables, full, cache=cache)
+
+    def encode(self, cnf):
+        return -cnf.literal(self.operand)
 
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        self.conjuncts = conjuncts
+        self.digest = hash(
+            ("and", tuple(hash(conjunct) for conjunct in conjuncts))
+        )
+        self.atoms = frozenset().union(
+            *[conjunct.atoms for conjunct in conjuncts]
         )
 
     def __repr__(self):
@@ -114,11 +220,30 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
-
-    def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+        """Returns the conjunction of this sentence's conjuncts and another."""
+        return And(*self.conjuncts, conjunct)
+
+    @memoized
+    def evaluate(self, model, cache=None):
+        return all(conjunct.evaluate(model, cache=cache)
+                   for conjunct in self.conjuncts)
+
+    @memoized
+    def table(self, tables, full, cache=None):
+        result = full
+        for conjunct in self.conjuncts:
+            result &= conjunct.table(tables, full, cache=cache)
+            if not result:
+                break
+        return result
+
+    def encode(self, cnf):
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        v = cnf.variable()
+        for literal in literals:
+            cnf.clauses.append([-v, literal])
+        cnf.clauses.append([v] + [-literal for literal in literals])
+        return v
 
     def formula(self):
         if len(self.conjuncts) == 1:
@@ -126,30 +251,44 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        self.disjuncts = disjuncts
+        self.digest = hash(
+            ("or", tuple(hash(disjunct) for disjunct in disjuncts))
+        )
+        self.atoms = frozenset().union(
+            *[disjunct.atoms for disjunct in disjuncts]
         )
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
-    def evaluate(self, model):
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
+    @memoized
+    def evaluate(self, model, cache=None):
+        return any(disjunct.evaluate(model, cache=cache)
+                   for disjunct in self.disjuncts)
+
+    @memoized
+    def table(self, tables, full, cache=None):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.table(tables, full, cache=cache)
+            if result == full:
+                break
+        return result
+
+    def encode(self, cnf):
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        v = cnf.variable()
+        for literal in literals:
+            cnf.clauses.append([v, -literal])
+        cnf.clauses.append([-v] + literals)
+        return v
 
     def formula(self):
         if len(self.disjuncts) == 1:
@@ -157,9 +296,6 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -167,30 +303,34 @@ class Implication(Sentence):
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        self.digest = hash(("implies", hash(antecedent), hash(consequent)))
+        self.atoms = antecedent.atoms | consequent.atoms
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
 
-    def evaluate(self, model):
-        return ((not self.antecedent.evaluate(model))
-                or self.consequent.evaluate(model))
+    @memoized
+    def evaluate(self, model, cache=None):
+        return ((not self.antecedent.evaluate(model, cache=cache))
+                or self.consequent.evaluate(model, cache=cache))
+
+    @memoized
+    def table(self, tables, full, cache=None):
+        return ((full ^ self.antecedent.table(tables, full, cache=cache))
+                | self.consequent.table(tables, full, cache=cache))
+
+    def encode(self, cnf):
+        a = cnf.literal(self.antecedent)
+        c = cnf.literal(self.consequent)
+        v = cnf.variable()
+        cnf.clauses.extend([[-v, -a, c], [v, a], [v, -c]])
+        return v
 
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -198,66 +338,436 @@ class Biconditional(Sentence):
         Sentence.validate(right)
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        self.digest = hash(("biconditional", hash(left), hash(right)))
+        self.atoms = left.atoms | right.atoms
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
-    def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+    @memoized
+    def evaluate(self, model, cache=None):
+        return (self.left.evaluate(model, cache=cache)
+                == self.right.evaluate(model, cache=cache))
+
+    @memoized
+    def table(self, tables, full, cache=None):
+        return (full ^ self.left.table(tables, full, cache=cache)
+                ^ self.right.table(tables, full, cache=cache))
+
+    def encode(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        v = cnf.variable()
+        cnf.clauses.extend([[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]])
+        return v
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
 
-def model_check(knowledge, query):
+def model_check(knowledge, query, workers=None):
     """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    return model_check_all(knowledge, [query], workers)[0]
+
+
+def model_check_all(knowledge, queries, workers=None):
+    """
+    Checks which of several queries knowledge base entails, enumerating
+    the models of knowledge once for all of them. Returns a list of
+    booleans in the order of `queries`.
+
+    With `workers`, the models are split by the values of their first
+    few symbols and checked in that many processes, all of which are
+    stopped as soon as no query can be entailed any more.
+    """
+
+    # Get all symbols in both knowledge and the queries
+    symbols = sorted(
+        knowledge.atoms.union(*[query.atoms for query in queries])
+    )
+
+    # The first TABLE_BITS symbols take every combination of values
+    # across the bits of their truth tables; the rest are enumerated
+    low = symbols[:TABLE_BITS]
+    high = symbols[TABLE_BITS:]
+    if not workers or not high:
+        return check_models(knowledge, queries, low, high, {})
+
+    split = min(len(high), (PARTS_PER_WORKER * workers - 1).bit_length())
+    parts = [
+        (knowledge, queries, low, high[split:],
+         dict(zip(high[:split], values)))
+        for values in itertools.product((True, False), repeat=split)
+    ]
+
+    entailed = [True] * len(queries)
+    with multiprocessing.Pool(workers) as pool:
+        for part in pool.imap_unordered(check_part, parts):
+            entailed = [a and b for a, b in zip(entailed, part)]
+            if not any(entailed):
+                break
+    return entailed
+
+
+def check_part(part):
+    """Calls check_models with a tuple of arguments, in a worker."""
+    return check_models(*part)
+
+
+def check_models(knowledge, queries, low, high, fixed):
+    """
+    Checks which queries hold in every model of knowledge where the
+    symbols of `fixed` have the given truth values. Symbols in `low` are
+    evaluated together as truth tables and those in `high` one by one.
+    """
+    full = (1 << (1 << len(low))) - 1
+    tables = dict(zip(low, truth_tables(len(low))))
+    for symbol, value in fixed.items():
+        tables[symbol] = full if value else 0
+
+    entailed = [True] * len(queries)
+    for values in itertools.product((full, 0), repeat=len(high)):
+        tables.update(zip(high, values))
+        # Each distinct subformula is evaluated once for this block
+        cache = {}
+        models = knowledge.table(tables, full, cache=cache)
+        if not models:
+            continue
+
+        # In every model where knowledge is true, a query that is
+        # entailed must also be true
+        for i, query in enumerate(queries):
+            if not entailed[i]:
+                continue
+            if models & ~query.table(tables, full, cache=cache):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by showing with a SAT solver
+    that knowledge and the negation of query cannot both be true.
+    """
+    cnf = CNF()
+    cnf.clauses.append([cnf.literal(knowledge)])
+    cnf.clauses.append([-cnf.literal(query)])
+    return not Solver(cnf.clauses, cnf.count).solve()
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form, built from sentences by the
+    Tseitin transformation. Variables are numbered from 1; a literal is
+    a variable, or its negation when true means the variable is false.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+        self.literals = {}
+
+    def variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        return self.count
+
+    def literal(self, sentence):
+        """
+        Returns the literal equivalent to a sentence, encoding each
+        distinct subformula only once.
+        """
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.encode(self)
+        return self.literals[sentence]
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver: unit propagation over two
+    watched literals per clause, a learned clause for every conflict, a
+    backjump to the level where that clause becomes unit, restarts, and
+    forgetting of the longer learned clauses.
+    """
+
+    # Factor by which the activity of recent conflict variables grows
+    DECAY = 0.95
+
+    # Conflicts between restarts, scaled by the Luby sequence
+    RESTART = 100
+
+    # Learned clauses kept before the longer half is forgotten, and the
+    # factor by which that limit grows each time
+    LEARNED = 2000
+    GROWTH = 1.1
+
+    def __init__(self, clauses, count):
+        self.count = count
+
+        # Per literal: 1 if true, -1 if false, 0 if unassigned. A list
+        # of 2 * count + 1 entries indexed by the literal itself, as the
+        # negative literals wrap around to the end
+        self.values = [0] * (2 * count + 1)
+
+        # Per variable: the decision level and clause that assigned it,
+        # the value it last had, and its activity in recent conflicts
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [False] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+
+        # Heap of (-activity, variable) from which decisions are taken.
+        # Entries are pushed when a variable is unassigned and skipped
+        # once stale, so every unassigned variable has an entry with its
+        # current activity
+        self.order = [(0.0, v) for v in range(1, count + 1)]
+
+        # Clauses of the problem and learned ones, of two or more literals
+        self.clauses = []
+        self.learned = []
+        self.capacity = Solver.LEARNED
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # Maps each literal to the clauses watching it
+        self.watches = {}
+        self.unsatisfiable = False
+        for clause in clauses:
+            self.add(clause)
+
+    def add(self, clause):
+        """Adds a clause of the problem, before solving."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value == -1:
+                self.unsatisfiable = True
+            elif value == 0:
+                self.assign(clause[0], None)
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            self.clauses.append(clause)
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Watches the first two literals of a clause."""
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def value(self, literal):
+        """Returns 1 if a literal is true, -1 if false, 0 if unassigned."""
+        return self.values[literal]
+
+    def assign(self, literal, reason):
+        """Makes a literal true at the current decision level."""
+        v = abs(literal)
+        self.values[literal] = 1
+        self.values[-literal] = -1
+        self.levels[v] = len(self.limits)
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one unassigned
+        literal left. Returns a clause made false, or None.
+        """
+        value = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for i, clause in enumerate(watching):
+
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                if value[clause[0]] == 1:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if value[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value[clause[0]] == -1:
+                        self.watches[false] = kept + watching[i + 1:]
+                        return clause
+                    self.assign(clause[0], clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting its first
+        literal, and the decision level to backjump to.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = []
+        pending = 0
+        literal = None
+        clause = conflict
+        i = len(self.trail) - 1
+        while True:
+            for other in clause:
+                v = abs(other)
+                if other == literal or v in seen or self.levels[v] == 0:
+                    continue
+                seen.add(v)
+                self.activity[v] += self.bump
+                if self.levels[v] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest assigned literal of this level, until
+            # only one is left (the first unique implication point)
+            while abs(self.trail[i]) not in seen:
+                i -= 1
+            literal = self.trail[i]
+            i -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        self.bump /= Solver.DECAY
+        if self.bump > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.count + 1)
+                          if self.values[v] == 0]
+            heapq.heapify(self.order)
+
+        if not learned:
+            return [-literal], 0
+        deepest = max(range(len(learned)),
+                      key=lambda k: self.levels[abs(learned[k])])
+        learned[0], learned[deepest] = learned[deepest], learned[0]
+        return [-literal] + learned, self.levels[abs(learned[0])]
+
+    def backtrack(self, level):
+        """Undoes every assignment made above a decision level."""
+        if len(self.limits) > level:
+            start = self.limits[level]
+            for literal in self.trail[start:]:
+                v = abs(literal)
+                self.phases[v] = literal > 0
+                self.values[literal] = 0
+                self.values[-literal] = 0
+                self.reasons[v] = None
+                heapq.heappush(self.order, (-self.activity[v], v))
+            del self.trail[start:]
+            del self.limits[level:]
+            self.head = start
+
+    def decide(self):
+        """Returns the unassigned variable with the most activity, or None."""
+        while self.order:
+            activity, v = heapq.heappop(self.order)
+            if self.values[v] == 0 and -activity == self.activity[v]:
+                return v
+        return None
+
+    def reduce(self):
+        """
+        Forgets the longer half of the learned clauses, and every clause
+        already satisfied, then watches the rest afresh. Only called at
+        decision level 0 with nothing left to propagate, where the only
+        reasons still held are for level 0 assignments, which conflict
+        analysis never looks at.
+        """
+        self.learned.sort(key=len)
+        del self.learned[len(self.learned) // 2:]
+        self.capacity = int(self.capacity * Solver.GROWTH)
+
+        self.watches = {}
+        for clauses in (self.clauses, self.learned):
+            clauses[:] = [clause for clause in clauses
+                          if all(self.values[literal] != 1
+                                 for literal in clause)]
+            for clause in clauses:
+                # Every clause left has two literals that are not false
+                clause.sort(key=lambda literal: self.values[literal] == -1)
+                self.watch(clause)
+
+    def solve(self):
+        """Returns True if the clauses can all be satisfied."""
+        if self.unsatisfiable:
+            return False
+        restarts = 0
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) > 1:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                self.assign(learned[0], learned if len(learned) > 1 else None)
+
+                # Start over from the top, keeping learned clauses
+                conflicts += 1
+                if conflicts >= Solver.RESTART * luby(restarts):
+                    restarts += 1
+                    conflicts = 0
+                    self.backtrack(0)
+            else:
+                if not self.limits and len(self.learned) > self.capacity:
+                    self.reduce()
+                v = self.decide()
+                if v is None:
+                    return True
+                self.limits.append(len(self.trail))
+                self.assign(v if self.phases[v] else -v, None)
+
+
+def luby(i):
+    """Returns term `i` of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    size = 1
+    power = 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size //= 2
+        power -= 1
+        i %= size
+    return 1 << power
+
+
+def truth_tables(count):
+    """
+    Returns, for each of `count` symbols, the integer whose bit m is set
+    when the symbol is true in model m, over all 2 ** count models.
+    """
+    full = (1 << (1 << count)) - 1
+    tables = []
+    for i in range(count):
+        # Bit m is set when bit i of m is: 2 ** i zeros, then 2 ** i
+        # ones, repeated across all the models
+        period = 1 << (i + 1)
+        ones = ((1 << (1 << i)) - 1) << (1 << i)
+        tables.append(full // ((1 << period) - 1) * ones)
+    return tables